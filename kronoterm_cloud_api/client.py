@@ -1,14 +1,22 @@
 __version__ = "0.1.17"
 
 import logging
+import math
+from array import array
 from collections import namedtuple
-from datetime import datetime
+from collections.abc import Iterable, Iterator
+from datetime import datetime, timedelta
 from typing import Any
 
 import requests
 
+from kronoterm_cloud_api.history import SnapshotHistory
 from kronoterm_cloud_api.kronoterm_enums import (
+    AnalogSeries,
     APIEndpoint,
+    ConsumptionSeries,
+    DigitalSeries,
+    GraphPeriod,
     HeatingLoop,
     HeatingLoopMode,
     HeatingLoopStatus,
@@ -31,6 +39,126 @@ class KronotermCloudApiSetFailedException(KronotermCloudApiException):
     pass
 
 
+def _to_float(value: Any) -> float | None:
+    """Convert histogram value to float, None if not convertible."""
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _decode_histogram_series(data: dict[str, Any]) -> dict[str, dict[str, list[float | None]]]:
+    """Decode histogram response to aligned per-series lists, grouped as in the response.
+
+    Series are lists found in groups (dictionaries) of the response, e.g. 'trend_consumption'. Series of a group are
+    assumed to start at the first bucket of the requested period (e.g. first hour of the day), so shorter series are
+    padded with None at the end to the length of the longest series in the group.
+
+    :param data: histogram response data
+    :return: group name to series name to list of values
+    """
+    groups: dict[str, dict[str, list[float | None]]] = {}
+    for group_name, group in data.items():
+        if not isinstance(group, dict):
+            continue
+        series = {
+            name: [_to_float(value) for value in values] for name, values in group.items() if isinstance(values, list)
+        }
+        if not series:
+            continue
+        length = max(len(values) for values in series.values())
+        for values in series.values():
+            values.extend([None] * (length - len(values)))
+        groups[group_name] = series
+    return groups
+
+
+TimelineSeries = namedtuple("TimelineSeries", ["timestamps", "values"])
+TimelineChunk = namedtuple("TimelineChunk", ["start", "end", "series"])
+
+
+def _decode_timeline_points(
+    points: list[Any], start: float, end: float, period_start: float, period_end: float
+) -> tuple[TimelineSeries, int, int, int]:
+    """Decode [timestamp, value] pairs of one timeline series straight into arrays.
+
+    :param points: [timestamp, value] pairs, timestamps in [ms]
+    :param start: start of the window as UNIX timestamp in [s]
+    :param end: end of the window as UNIX timestamp in [s]
+    :param period_start: start of the requested period as UNIX timestamp in [s]
+    :param period_end: end of the requested period as UNIX timestamp in [s]
+    :return: decoded series and counts of malformed, out of period and out of window points
+    """
+    timestamps, values = array("d"), array("f")
+    malformed = outside_period = outside_window = 0
+    for point in points:
+        timestamp = _to_float(point[0]) if isinstance(point, list | tuple) and len(point) == 2 else None
+        if timestamp is None:
+            malformed += 1
+        elif not period_start <= timestamp / 1000 < period_end:
+            outside_period += 1
+        elif not start <= timestamp / 1000 < end:
+            outside_window += 1
+        else:
+            value = _to_float(point[1])
+            timestamps.append(timestamp / 1000)
+            values.append(math.nan if value is None else value)
+    return TimelineSeries(timestamps, values), malformed, outside_period, outside_window
+
+
+def _decode_timeline_series(
+    data: dict[str, Any],
+    start: float,
+    end: float,
+    period_start: float | None = None,
+    period_end: float | None = None,
+) -> dict[str, dict[str, TimelineSeries]]:
+    """Decode timeline graph response to compact per-series arrays, grouped as in the response.
+
+    Expected payload is `{"<group>": {"<series>": [[timestamp, value], ...], ...}, ...}` with timestamps as UTC
+    UNIX epoch in milliseconds (as used by the web UI graph). Only samples within [start, end) are kept.
+    Malformed pairs and samples outside of requested period [period_start, period_end) are logged as warning,
+    as they mean the payload or timestamp convention differs from the expected one. Samples inside the period
+    but outside of the window are expected (partial first and last chunk) and only logged at debug level.
+
+    :param data: timeline graph response data
+    :param start: start of the window as UNIX timestamp in [s]
+    :param end: end of the window as UNIX timestamp in [s]
+    :param period_start: start of the requested period as UNIX timestamp in [s], defaults to `start`
+    :param period_end: end of the requested period as UNIX timestamp in [s], defaults to `end`
+    :return: group name to series name to TimelineSeries of timestamps in [s] ('d' array)
+        and values ('f' array, NaN if missing)
+    """
+    period_start = start if period_start is None else period_start
+    period_end = end if period_end is None else period_end
+    groups: dict[str, dict[str, TimelineSeries]] = {}
+    for group_name, group in data.items():
+        if not isinstance(group, dict):
+            continue
+        for name, points in group.items():
+            if not isinstance(points, list):
+                continue
+            series, malformed, outside_period, outside_window = _decode_timeline_points(
+                points, start, end, period_start, period_end
+            )
+            if malformed or outside_period:
+                log.warning(
+                    "Timeline series '%s.%s': dropped %d malformed and %d out of period points (kept %d)",
+                    group_name,
+                    name,
+                    malformed,
+                    outside_period,
+                    len(series.timestamps),
+                )
+            if outside_window:
+                log.debug("Timeline series '%s.%s': dropped %d out of window points", group_name, name, outside_window)
+            if series.timestamps:
+                groups.setdefault(group_name, {})[name] = series
+    if not groups:
+        log.warning("No timeline series decoded for window [%s, %s)", start, end)
+    return groups
+
+
 class KronotermCloudApi:
     DEFAULT_HEADERS = {
         "Host": "cloud.kronoterm.com",
@@ -46,11 +174,26 @@ class KronotermCloudApi:
 
     ERROR_RESULT = ("action",)
 
-    def __init__(self, username: str, password: str):
+    # Series requested by 'Theoretical use histogram' in cloud web UI
+    THEORETICAL_USE_SERIES = (
+        AnalogSeries.SERIES_17,
+        DigitalSeries.SERIES_90,
+        DigitalSeries.SERIES_0,
+        DigitalSeries.SERIES_91,
+        DigitalSeries.SERIES_92,
+        DigitalSeries.SERIES_1,
+        DigitalSeries.SERIES_2,
+        DigitalSeries.SERIES_24,
+        DigitalSeries.SERIES_71,
+    )
+
+    def __init__(self, username: str, password: str, history_capacity: int = 0):
         """Kronoterm heat pump cloud API.
 
         :param username: kronoterm cloud username
         :param password: kronoterm cloud password
+        :param history_capacity: number of recent snapshots kept in `history`, 0 disables history.
+            Basic and system review data polled within a few seconds are merged into one snapshot.
         """
         self.username = username
         self.password = password
@@ -67,6 +210,9 @@ class KronotermCloudApi:
         self.loop_names: str | None = None  # CircleNames
         self.active_errors_count: str | None = None
 
+        # Recent snapshots recorded from basic and system review data
+        self.history: SnapshotHistory | None = SnapshotHistory(history_capacity) if history_capacity else None
+
     def login(self) -> None:
         """Log in to cloud."""
 
@@ -83,7 +229,7 @@ class KronotermCloudApi:
         log.info("Logged in and session cookie set.")
         self.update_heat_pump_basic_information()
 
-    def _request_with_retrie(self, request_type: str, url: str, **kwargs) -> requests.Response:
+    def _request_with_retrie(self, request_type: str, url: str, **kwargs) -> tuple[requests.Response, dict[str, Any]]:
         """
         Perform a GET request to the given URL with retries in case of errors.
 
@@ -93,13 +239,14 @@ class KronotermCloudApi:
         :param request_type: The type of request to perform (GET, POST, ...).
         :param url: The URL to send the GET request to.
         :param kwargs: Additional arguments to pass to the `requests.get` method.
-        :return: The response object from the successful GET request.
+        :return: The response object from the successful GET request and its parsed JSON data.
         :raises KronotermCloudApiException: If the request fails after retries.
         """
         result: str | None = None
         for _ in range(2):
             response = getattr(requests, request_type.lower())(url, headers=self.headers, **kwargs)
-            result = response.json().get("result")
+            data = response.json()
+            result = data.get("result")
             if result in self.ERROR_RESULT:
                 log.warning("GET failed, API returned result='%s'. Trying to login again ...", result)
                 self.login()
@@ -109,7 +256,7 @@ class KronotermCloudApi:
         else:
             log.error("GET failed, API returned result='%s'", result)
             raise KronotermCloudApiException(f"GET failed, API returned result='{result}'")
-        return response
+        return response, data
 
     def get_raw(self, url: str, **kwargs) -> requests.Response:
         """GET response from given url API endpoint.
@@ -120,17 +267,29 @@ class KronotermCloudApi:
         """
         url = self._base_api_url + url
         log.info("GET: '%s' [headers='%s', kwargs='%s']", url, self.headers, kwargs)
-        response = self._request_with_retrie("GET", url=url, **kwargs)
+        response, _ = self._request_with_retrie("GET", url=url, **kwargs)
         log.info("GET RESP: '%s'", response.text)
         return response
 
-    def post_raw(self, url: str, **kwargs) -> requests.Response:
+    def post_raw(self, url: str, log_body: bool = True, **kwargs) -> requests.Response:
         """POST response from given url API endpoint.
 
         :param url: url of the request
+        :param log_body: log response body, otherwise only its size is logged
         :param kwargs: any other arguments that will be passed to requests.post()
         :return: response
         """
+        response, _ = self._post(url, log_body, **kwargs)
+        return response
+
+    def _post(self, url: str, log_body: bool = True, **kwargs) -> tuple[requests.Response, dict[str, Any]]:
+        """POST to given url API endpoint.
+
+        :param url: url of the request
+        :param log_body: log response body, otherwise only its size is logged
+        :param kwargs: any other arguments that will be passed to requests.post()
+        :return: response and its parsed JSON data
+        """
         if kwargs.get("headers", False):
             headers = kwargs.get("headers")
             kwargs.pop("headers")
@@ -138,9 +297,12 @@ class KronotermCloudApi:
             headers = self.headers
         url = self._base_api_url + url
         log.info("POST: '%s' [headers='%s', kwargs='%s']", url, headers, kwargs)
-        response = self._request_with_retrie("post", url, **kwargs)
-        log.info("POST RESP: '%s'", response.text)
-        return response
+        response, data = self._request_with_retrie("post", url, **kwargs)
+        if log_body:
+            log.info("POST RESP: '%s'", response.text)
+        else:
+            log.info("POST RESP: %d bytes", len(response.content))
+        return response, data
 
     def update_heat_pump_basic_information(self) -> None:
         """Update heat pump information from INITIAL load data."""
@@ -161,19 +323,28 @@ class KronotermCloudApi:
         return data
 
     def get_basic_data(self) -> dict[str, Any]:
-        """Get basic view data.
+        """Get basic view data. Recorded to `history` if enabled.
 
         :return: basic view data
         """
         data = self.get_raw(APIEndpoint.BASIC.value).json()
+        if self.history is not None:
+            config = data.get("TemperaturesAndConfig", {})
+            self.history.append(
+                outside_temp=_to_float(config.get("outside_temp")),
+                reservoir_temp=_to_float(config.get("reservoir_temp")),
+                working_function=_to_float(config.get("working_function")),
+            )
         return data
 
     def get_system_review_data(self) -> dict[str, Any]:
-        """Get system review view data.
+        """Get system review view data. Recorded to `history` if enabled.
 
         :return: system review data
         """
         data = self.get_raw(APIEndpoint.SYSTEM_REVIEW.value).json()
+        if self.history is not None and (function_data := data.get("CurrentFunctionData")):
+            self.history.append(dv_temp=_to_float(function_data[0].get("dv_temp")))
         return data
 
     def get_heating_loop_data(self, loop: HeatingLoop) -> dict[str, Any]:
@@ -215,26 +386,150 @@ class KronotermCloudApi:
         else:
             return self.get_alarms_data().get("AlarmsData")
 
+    @staticmethod
+    def _graph_request_data(
+        series: Iterable[AnalogSeries | DigitalSeries], period: GraphPeriod, when: datetime | None = None
+    ) -> dict[str, Any]:
+        """Build POST data for graph and histogram requests.
+
+        All requested series are packed into 'aValues[]' and 'dValues[]' arrays of a single request.
+
+        :param series: analog and/or digital series to request
+        :param period: period of the request
+        :param when: point in time selecting the period, defaults to now
+        :return: POST request data
+        """
+        series = tuple(series)
+        time_tuple = (when or datetime.now()).timetuple()
+        analog_values = [str(s.value) for s in series if isinstance(s, AnalogSeries)]
+        digital_values = [str(s.value) for s in series if isinstance(s, DigitalSeries)]
+        if not analog_values and not digital_values:
+            raise ValueError("At least one series must be requested")
+        return {
+            "year": str(time_tuple.tm_year),
+            "d1": str(time_tuple.tm_yday),  # day of the year
+            "d2": str(time_tuple.tm_hour) if period == GraphPeriod.HOUR else "0",  # hour
+            "type": period.value,
+            "aValues[]": analog_values,
+            "dValues[]": digital_values,
+        }
+
+    def get_histogram_data(
+        self,
+        series: Iterable[AnalogSeries | DigitalSeries],
+        period: GraphPeriod = GraphPeriod.DAY,
+        when: datetime | None = None,
+    ) -> dict[str, Any]:
+        """Get histogram data for all requested series in one request.
+
+        :param series: analog and/or digital series to request
+        :param period: histogram period
+        :param when: point in time selecting the period, defaults to now
+        :return: histogram data
+        """
+        request_data = self._graph_request_data(series, period, when)
+        data = self.post_raw(APIEndpoint.CONSUMPTION_HISTOGRAM.value, data=request_data, headers=self.headers).json()
+        return data
+
+    def get_histogram_series(
+        self,
+        series: Iterable[AnalogSeries | DigitalSeries],
+        period: GraphPeriod = GraphPeriod.DAY,
+        when: datetime | None = None,
+    ) -> dict[str, dict[str, list[float | None]]]:
+        """Get histogram data for all requested series in one request, decoded to aligned per-series lists.
+
+        :param series: analog and/or digital series to request
+        :param period: histogram period
+        :param when: point in time selecting the period, defaults to now
+        :return: group name (e.g. 'trend_consumption') to series name to list of values,
+            lists of a group are of the same length (padded with None)
+        """
+        return _decode_histogram_series(self.get_histogram_data(series, period, when))
+
+    def get_timeline_data(
+        self,
+        series: Iterable[AnalogSeries | DigitalSeries],
+        period: GraphPeriod = GraphPeriod.DAY,
+        when: datetime | None = None,
+    ) -> dict[str, Any]:
+        """Get timeline graph data for all requested series in one request. As displayed in 'Timeline graph'.
+
+        :param series: analog and/or digital series to request
+        :param period: timeline period
+        :param when: point in time selecting the period, defaults to now
+        :return: timeline graph data
+        """
+        request_data = self._graph_request_data(series, period, when)
+        # Timeline responses can be large, log only their size and parse them only once
+        _, data = self._post(APIEndpoint.TIMELINE_GRAPH.value, log_body=False, data=request_data)
+        return data
+
+    def iter_timeline(
+        self,
+        series: Iterable[AnalogSeries | DigitalSeries],
+        start: datetime,
+        end: datetime,
+        chunk: GraphPeriod = GraphPeriod.DAY,
+    ) -> Iterator[TimelineChunk]:
+        """Iterate over timeline graph data of arbitrary time window.
+
+        Window is split into chunks (whole days or hours), each chunk is fetched and decoded separately
+        so only one chunk is held in memory at a time. Supports chunks:
+        - DAY
+        - HOUR
+
+        :param series: analog and/or digital series to request
+        :param start: start of the window
+        :param end: end of the window (not included)
+        :param chunk: chunk period
+        :return: iterator of TimelineChunk(start, end, series) where series maps group name to series name
+            to TimelineSeries
+        """
+        match chunk:
+            case GraphPeriod.DAY:
+                step = timedelta(days=1)
+                chunk_start = start.replace(hour=0, minute=0, second=0, microsecond=0)
+            case GraphPeriod.HOUR:
+                step = timedelta(hours=1)
+                chunk_start = start.replace(minute=0, second=0, microsecond=0)
+            case _:
+                raise ValueError(f"Timeline chunk '{chunk.name}' not supported")
+        return self._iter_timeline_chunks(tuple(series), start, end, chunk, chunk_start, step)
+
+    def _iter_timeline_chunks(
+        self,
+        series: tuple[AnalogSeries | DigitalSeries, ...],
+        start: datetime,
+        end: datetime,
+        chunk: GraphPeriod,
+        chunk_start: datetime,
+        step: timedelta,
+    ) -> Iterator[TimelineChunk]:
+        """Fetch and decode timeline chunks, see `iter_timeline`."""
+        while chunk_start < end:
+            chunk_end = chunk_start + step
+            window_start, window_end = max(chunk_start, start), min(chunk_end, end)
+            # Raw response is not referenced after decoding, so only decoded arrays are held while chunk is consumed
+            yield TimelineChunk(
+                start=window_start,
+                end=window_end,
+                series=_decode_timeline_series(
+                    self.get_timeline_data(series, chunk, chunk_start),
+                    window_start.timestamp(),
+                    window_end.timestamp(),
+                    chunk_start.timestamp(),
+                    chunk_end.timestamp(),
+                ),
+            )
+            chunk_start = chunk_end
+
     def get_theoretical_use_data(self) -> dict[str, Any]:
         """Get theoretical use view data. As displayed in 'Theoretical use histogram'.
 
         :return: theoretical use data
         """
-        url = "TopPage=4&Subpage=4&Action=4"
-        # TODO: research dValues[]!!!
-
-        day_of_year = datetime.now().timetuple().tm_yday
-        year = datetime.now().timetuple().tm_year
-        data = {
-            "year": str(year),
-            "d1": str(day_of_year),  # day of the year
-            "d2": "0",  # hour
-            "type": "day",  # # year, month, hour, week, day, hour
-            "aValues[]": "17",  # # data to graph
-            "dValues[]": ["90", "0", "91", "92", "1", "2", "24", "71"],  # # data to graph
-        }
-        data = self.post_raw(url, data=data, headers=self.headers).json()
-        return data
+        return self.get_histogram_data(self.THEORETICAL_USE_SERIES, GraphPeriod.DAY)
 
     def get_outside_temperature(self) -> float:
         """Get current outside temperature.
@@ -396,10 +691,10 @@ class KronotermCloudApi:
         """
         data = self.get_theoretical_use_data()
 
-        heating_consumption = data["trend_consumption"]["CompHeating"][-1]
-        cooling_consumption = data["trend_consumption"]["CompActiveCooling"][-1]
-        tap_water_consumption = data["trend_consumption"]["CompTapWater"][-1]
-        pumps_consumption = data["trend_consumption"]["CPLoops"][-1]
+        heating_consumption = data["trend_consumption"][ConsumptionSeries.HEATING][-1]
+        cooling_consumption = data["trend_consumption"][ConsumptionSeries.COOLING][-1]
+        tap_water_consumption = data["trend_consumption"][ConsumptionSeries.TAP_WATER][-1]
+        pumps_consumption = data["trend_consumption"][ConsumptionSeries.PUMPS][-1]
         all_consumption = heating_consumption + cooling_consumption + tap_water_consumption + pumps_consumption
 
         HPConsumption = namedtuple("HPConsumption", ["heating", "cooling", "tap_water", "pumps", "all"])
@@ -0,0 +1,165 @@
+import logging
+import math
+import time
+from array import array
+from collections.abc import Iterable
+
+log = logging.getLogger(__name__)
+
+
+class SnapshotHistory:
+    """Fixed capacity, array backed ring buffer of recent heat pump snapshots.
+
+    Every snapshot is a timestamp and one value per field. Fields missing from a snapshot are stored as NaN and
+    ignored by statistics. Appends within `merge_interval` of the latest snapshot are merged into it, so values
+    polled from different endpoints in one poll cycle share a snapshot. Memory use is fixed by capacity and does
+    not grow with uptime.
+    """
+
+    FIELDS = ("outside_temp", "dv_temp", "reservoir_temp", "working_function")
+
+    def __init__(self, capacity: int, fields: Iterable[str] = FIELDS, merge_interval: float = 5.0):
+        """Snapshot history.
+
+        :param capacity: maximum number of snapshots kept (appends after merging, not poll cycles),
+            oldest are overwritten
+        :param fields: names of the fields kept for every snapshot
+        :param merge_interval: appends within this many [s] of the latest snapshot are merged into it, 0 disables
+        """
+        if capacity <= 0:
+            raise ValueError(f"Capacity must be positive, got '{capacity}'")
+        self.capacity = capacity
+        self.fields = tuple(fields)
+        self.merge_interval = merge_interval
+        self._timestamps = array("d", [math.nan]) * capacity
+        self._values = {field: array("d", [math.nan]) * capacity for field in self.fields}
+        self._head = 0  # index of the next write
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def append(self, timestamp: float | None = None, **values: float | None) -> None:
+        """Append snapshot, overwrite the oldest one if full.
+
+        If the latest snapshot is not older than `merge_interval`, given values are written into it instead.
+        Timestamps must not decrease. If the clock steps back, the default (now) is clamped to the latest timestamp
+        and a new snapshot is started (never merged) with a warning.
+
+        :param timestamp: UNIX timestamp of the snapshot in [s], defaults to now
+        :param values: field values of the snapshot, missing fields are stored as NaN
+        """
+        if unknown := values.keys() - set(self.fields):
+            raise ValueError(f"Unknown fields {sorted(unknown)}")
+        latest = (self._head - 1) % self.capacity
+        latest_timestamp = self._timestamps[latest] if self._size else -math.inf
+        clock_stepped_back = False
+        if timestamp is None:
+            timestamp = time.time()
+            if timestamp < latest_timestamp:
+                log.warning("Clock stepped back by %.3f s, clamping snapshot timestamp", latest_timestamp - timestamp)
+                timestamp, clock_stepped_back = latest_timestamp, True
+        elif timestamp < latest_timestamp:
+            raise ValueError(f"Timestamp '{timestamp}' is older than the latest snapshot '{latest_timestamp}'")
+
+        if not clock_stepped_back and timestamp - latest_timestamp <= self.merge_interval:
+            for field, value in values.items():
+                if value is not None:
+                    self._values[field][latest] = value
+            return
+
+        self._timestamps[self._head] = timestamp
+        for field, field_values in self._values.items():
+            value = values.get(field)
+            field_values[self._head] = math.nan if value is None else value
+        self._head = (self._head + 1) % self.capacity
+        self._size = min(self._size + 1, self.capacity)
+
+    def _window_start(self, seconds: float | None, now: float | None) -> int:
+        """Get chronological index of the first snapshot within the last `seconds` before `now`, bisecting the ring."""
+        if seconds is None or not self._size:
+            return 0
+        oldest = (self._head - self._size) % self.capacity
+        since = (time.time() if now is None else now) - seconds
+        low, high = 0, self._size
+        while low < high:
+            middle = (low + high) // 2
+            if self._timestamps[(oldest + middle) % self.capacity] < since:
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    def _copy(self, data: array, start: int) -> array:
+        """Copy chronological part [start, size) of the ring buffer."""
+        first = (self._head - self._size + start) % self.capacity
+        end = first + self._size - start
+        if end <= self.capacity:
+            return data[first:end]
+        return data[first:] + data[: end - self.capacity]
+
+    def window(self, field: str, seconds: float | None = None, now: float | None = None) -> tuple[array, array]:
+        """Get timestamps and values of a field in chronological order.
+
+        :param field: name of the field
+        :param seconds: only include snapshots from the last `seconds` before `now`, empty if there are none
+        :param now: UNIX timestamp the window ends at in [s], defaults to now
+        :return: timestamps in [s] and values of the field, missing values are NaN
+        """
+        if field not in self._values:
+            raise ValueError(f"Unknown field '{field}'")
+        start = self._window_start(seconds, now)
+        return self._copy(self._timestamps, start), self._copy(self._values[field], start)
+
+    def _valid_values(self, field: str, seconds: float | None, now: float | None) -> list[float]:
+        """Get values of a field without missing (NaN) values."""
+        _, values = self.window(field, seconds, now)
+        return [value for value in values if not math.isnan(value)]
+
+    def min(self, field: str, seconds: float | None = None, now: float | None = None) -> float | None:
+        """Get minimum of a field.
+
+        :param field: name of the field
+        :param seconds: only include snapshots from the last `seconds` before `now`
+        :param now: UNIX timestamp the window ends at in [s], defaults to now
+        :return: minimum, None if there are no values
+        """
+        return min(self._valid_values(field, seconds, now), default=None)
+
+    def max(self, field: str, seconds: float | None = None, now: float | None = None) -> float | None:
+        """Get maximum of a field.
+
+        :param field: name of the field
+        :param seconds: only include snapshots from the last `seconds` before `now`
+        :param now: UNIX timestamp the window ends at in [s], defaults to now
+        :return: maximum, None if there are no values
+        """
+        return max(self._valid_values(field, seconds, now), default=None)
+
+    def mean(self, field: str, seconds: float | None = None, now: float | None = None) -> float | None:
+        """Get mean of a field.
+
+        :param field: name of the field
+        :param seconds: only include snapshots from the last `seconds` before `now`
+        :param now: UNIX timestamp the window ends at in [s], defaults to now
+        :return: mean, None if there are no values
+        """
+        values = self._valid_values(field, seconds, now)
+        return math.fsum(values) / len(values) if values else None
+
+    def rate_of_change(self, field: str, seconds: float | None = None, now: float | None = None) -> float | None:
+        """Get rate of change of a field between the oldest and the newest value.
+
+        :param field: name of the field
+        :param seconds: only include snapshots from the last `seconds` before `now`
+        :param now: UNIX timestamp the window ends at in [s], defaults to now
+        :return: rate of change in [unit/s], None if there are less than two values
+        """
+        timestamps, values = self.window(field, seconds, now)
+        first = next((i for i, value in enumerate(values) if not math.isnan(value)), None)
+        if first is None:
+            return None
+        last = next(i for i in range(len(values) - 1, -1, -1) if not math.isnan(values[i]))
+        if timestamps[last] == timestamps[first]:
+            return None
+        return (values[last] - values[first]) / (timestamps[last] - timestamps[first])
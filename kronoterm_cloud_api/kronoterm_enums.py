@@ -26,8 +26,51 @@ class APIEndpoint(StrEnum):
 
     ADVANCED_SETTINGS = "TopPage=3&Subpage=11&Action=1"
 
-    # TIMELINE_GRAPH = "TopPage=4&Subpage=1&Action=3"
-    # CONSUMPTION_HISTOGRAM = "TopPage=4&Subpage=4&Action=4"
+    TIMELINE_GRAPH = "TopPage=4&Subpage=1&Action=3"
+    CONSUMPTION_HISTOGRAM = "TopPage=4&Subpage=4&Action=4"
+
+
+class GraphPeriod(StrEnum):
+    """Time period ('type') of graph and histogram requests"""
+
+    YEAR = "year"
+    MONTH = "month"
+    WEEK = "week"
+    DAY = "day"
+    HOUR = "hour"
+
+
+class AnalogSeries(IntEnum):
+    """Analog series ids ('aValues[]') used by graph and histogram requests.
+    Members are named by raw id until mapping of ids to measured quantities is known.
+    """
+
+    SERIES_17 = 17
+
+
+class DigitalSeries(IntEnum):
+    """Digital series ids ('dValues[]') used by graph and histogram requests.
+    Members are named by raw id until mapping of ids to measured quantities is known.
+    """
+
+    # Ids as requested by the 'Theoretical use histogram' in cloud web UI
+    SERIES_0 = 0
+    SERIES_1 = 1
+    SERIES_2 = 2
+    SERIES_24 = 24
+    SERIES_71 = 71
+    SERIES_90 = 90
+    SERIES_91 = 91
+    SERIES_92 = 92
+
+
+class ConsumptionSeries(StrEnum):
+    """Series of 'trend_consumption' group in theoretical use histogram response"""
+
+    HEATING = "CompHeating"
+    COOLING = "CompActiveCooling"
+    TAP_WATER = "CompTapWater"
+    PUMPS = "CPLoops"
 
 
 class WorkingFunction(IntEnum):
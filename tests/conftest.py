@@ -1,3 +1,4 @@
+import json
 import os
 
 import pytest
@@ -8,6 +9,28 @@ from kronoterm_cloud_api.client import KronotermCloudApi
 load_dotenv()
 
 
+class FakeResponse:
+    """Minimal stand-in for requests.Response returning given JSON data."""
+
+    def __init__(self, data: dict):
+        """Fake response.
+
+        :param data: JSON data of the response
+        """
+        self.content = json.dumps(data).encode()
+        self.text = self.content.decode()
+        self.json_calls = 0
+        self._data = data
+
+    def json(self) -> dict:
+        """Get JSON data of the response.
+
+        :return: JSON data
+        """
+        self.json_calls += 1
+        return self._data
+
+
 @pytest.fixture(scope="session")
 def kronoterm_user() -> dict:
     """Get kronoterm cloud username and password as dict.
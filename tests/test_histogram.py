@@ -0,0 +1,54 @@
+from datetime import datetime
+
+import pytest
+
+from kronoterm_cloud_api.client import KronotermCloudApi, _decode_histogram_series
+from kronoterm_cloud_api.kronoterm_enums import GraphPeriod
+
+
+def test_decode_histogram_series():
+    """
+    GIVEN histogram response with 'trend_consumption' group of series of different length
+    WHEN response is decoded
+    THEN series must be grouped as in the response and converted to float,
+      AND shorter series must be padded with None,
+      AND non-numeric values must be None
+    """
+    data = {
+        "result": "success",
+        "trend_consumption": {"CompHeating": [0, "0.5", 1.25], "CPLoops": [0.1, "-"], "unit": "kWh"},
+        "other": {"CompHeating": [7]},
+    }
+    assert _decode_histogram_series(data) == {
+        "trend_consumption": {"CompHeating": [0.0, 0.5, 1.25], "CPLoops": [0.1, None, None]},
+        "other": {"CompHeating": [7.0]},
+    }
+
+
+def test_graph_request_data_theoretical_use():
+    """
+    GIVEN theoretical use series passed as generator
+    WHEN graph request data is built
+    THEN all series must be packed in the order of previously hardcoded request
+    """
+    request_data = KronotermCloudApi._graph_request_data(
+        (s for s in KronotermCloudApi.THEORETICAL_USE_SERIES), GraphPeriod.DAY, datetime(2025, 2, 1, 13)
+    )
+    assert request_data == {
+        "year": "2025",
+        "d1": "32",
+        "d2": "0",
+        "type": "day",
+        "aValues[]": ["17"],
+        "dValues[]": ["90", "0", "91", "92", "1", "2", "24", "71"],
+    }
+
+
+def test_graph_request_data_no_series():
+    """
+    GIVEN no series
+    WHEN graph request data is built
+    THEN ValueError must be raised
+    """
+    with pytest.raises(ValueError, match="At least one series"):
+        KronotermCloudApi._graph_request_data([], GraphPeriod.DAY)
@@ -0,0 +1,179 @@
+import logging
+import math
+import time
+
+import pytest
+from conftest import FakeResponse
+
+from kronoterm_cloud_api.client import KronotermCloudApi
+from kronoterm_cloud_api.history import SnapshotHistory
+from kronoterm_cloud_api.kronoterm_enums import APIEndpoint
+
+
+@pytest.fixture(scope="function")
+def history() -> SnapshotHistory:
+    """Get SnapshotHistory with capacity of 3 snapshots."""
+    return SnapshotHistory(capacity=3)
+
+
+def test_history_overwrites_oldest(history: SnapshotHistory):
+    """
+    GIVEN history with capacity of 3 snapshots
+    WHEN 5 snapshots are appended
+    THEN only the newest 3 must be kept in chronological order
+    """
+    for i in range(5):
+        history.append(timestamp=i * 60, outside_temp=i)
+    timestamps, values = history.window("outside_temp")
+    assert len(history) == 3
+    assert list(timestamps) == [120, 180, 240]
+    assert list(values) == [2, 3, 4]
+
+
+def test_history_statistics(history: SnapshotHistory):
+    """
+    GIVEN history with snapshots of outside temperature and a missing value
+    WHEN rolling statistics are queried
+    THEN missing values must be ignored
+      AND statistics must be limited to the requested window
+    """
+    history.append(timestamp=0, outside_temp=10.0)
+    history.append(timestamp=60, dv_temp=35.0)
+    history.append(timestamp=120, outside_temp=13.0)
+    assert history.min("outside_temp") == 10.0
+    assert history.max("outside_temp") == 13.0
+    assert history.mean("outside_temp") == 11.5
+    assert history.rate_of_change("outside_temp") == pytest.approx(3.0 / 120)
+    assert history.mean("outside_temp", seconds=60, now=120) == 13.0
+    assert history.rate_of_change("outside_temp", seconds=60, now=120) is None
+    assert math.isnan(history.window("dv_temp")[1][0])
+
+
+def test_history_unknown_field(history: SnapshotHistory):
+    """
+    GIVEN history with default fields
+    WHEN snapshot with unknown field is appended
+    THEN ValueError must be raised
+    """
+    with pytest.raises(ValueError, match="Unknown fields"):
+        history.append(room_temp=24.0)
+
+
+def test_history_merges_close_appends(history: SnapshotHistory):
+    """
+    GIVEN history with default merge interval
+    WHEN values are appended within merge interval of the latest snapshot
+    THEN they must be merged into the latest snapshot
+      AND later appends must start a new snapshot
+    """
+    history.append(timestamp=0, outside_temp=10.0)
+    history.append(timestamp=1, dv_temp=35.0)
+    history.append(timestamp=60, outside_temp=11.0)
+    assert len(history) == 2
+    assert list(history.window("dv_temp")[1][:1]) == [35.0]
+    assert list(history.window("outside_temp")[1]) == [10.0, 11.0]
+
+
+def test_history_timestamps_must_not_decrease(history: SnapshotHistory):
+    """
+    GIVEN history with a snapshot
+    WHEN snapshot older than the latest is appended
+    THEN ValueError must be raised
+    """
+    history.append(timestamp=100, outside_temp=10.0)
+    with pytest.raises(ValueError, match="older than the latest"):
+        history.append(timestamp=50, outside_temp=9.0)
+
+
+def test_history_window_wraps_ring(history: SnapshotHistory):
+    """
+    GIVEN full history which wrapped around the ring
+    WHEN window of the last snapshots is queried
+    THEN only snapshots within the window must be returned in chronological order
+    """
+    for i in range(5):
+        history.append(timestamp=i * 60, outside_temp=i)
+    timestamps, values = history.window("outside_temp", seconds=60, now=240)
+    assert list(timestamps) == [180, 240]
+    assert list(values) == [3, 4]
+
+
+def test_history_keeps_exact_values(history: SnapshotHistory):
+    """
+    GIVEN history with values not exactly representable in binary
+    WHEN statistics are queried
+    THEN appended values must be returned exactly
+    """
+    history.append(timestamp=0, outside_temp=21.3)
+    history.append(timestamp=60, outside_temp=21.4)
+    assert history.max("outside_temp") == 21.4
+    assert history.min("outside_temp") == 21.3
+    assert history.mean("outside_temp") == (21.3 + 21.4) / 2
+
+
+def test_history_window_relative_to_now(history: SnapshotHistory):
+    """
+    GIVEN history with the latest snapshot one hour old
+    WHEN statistics of the last 10 minutes are queried
+    THEN there must be no values
+    """
+    now = time.time()
+    history.append(timestamp=now - 3600, outside_temp=10.0)
+    assert history.mean("outside_temp", seconds=600) is None
+    assert len(history.window("outside_temp", seconds=600)[0]) == 0
+    assert history.mean("outside_temp", seconds=7200) == 10.0
+
+
+def test_history_clock_step_back(monkeypatch: pytest.MonkeyPatch, caplog: pytest.LogCaptureFixture):
+    """
+    GIVEN history with snapshot timestamped in the future of the clock (clock stepped back)
+    WHEN snapshots are appended with default timestamp
+    THEN every append must start a new snapshot with clamped timestamp
+      AND warning must be logged
+    """
+    history = SnapshotHistory(capacity=10)
+    history.append(timestamp=1000, outside_temp=0.0)
+    monkeypatch.setattr(time, "time", lambda: 500.0)
+    with caplog.at_level(logging.WARNING):
+        for i in range(1, 5):
+            history.append(outside_temp=float(i))
+    timestamps, values = history.window("outside_temp")
+    assert list(timestamps) == [1000] * 5
+    assert list(values) == [0, 1, 2, 3, 4]
+    assert "Clock stepped back" in caplog.text
+
+
+@pytest.mark.parametrize("history_capacity", [0, 10], ids=["disabled", "enabled"])
+def test_client_records_history(monkeypatch: pytest.MonkeyPatch, history_capacity: int):
+    """
+    GIVEN client with <history_capacity>
+    WHEN basic and system review data are polled
+    THEN polled values must be recorded to one snapshot if history is enabled
+      AND history must be None if disabled
+
+    Examples:
+      | history_capacity |
+      | 0                |
+      | 10               |
+    """
+    responses = {
+        APIEndpoint.BASIC.value: {
+            "TemperaturesAndConfig": {"outside_temp": "5.5", "reservoir_temp": "30.0", "working_function": 5}
+        },
+        APIEndpoint.SYSTEM_REVIEW.value: {"CurrentFunctionData": [{"dv_temp": "40.5"}]},
+    }
+    kronoterm_cloud_api = KronotermCloudApi(username="user", password="password", history_capacity=history_capacity)
+    monkeypatch.setattr(kronoterm_cloud_api, "get_raw", lambda url: FakeResponse(responses[url]))
+
+    kronoterm_cloud_api.get_basic_data()
+    kronoterm_cloud_api.get_system_review_data()
+
+    if not history_capacity:
+        assert kronoterm_cloud_api.history is None
+        return
+    history = kronoterm_cloud_api.history
+    assert len(history) == 1
+    assert history.mean("outside_temp") == 5.5
+    assert history.mean("reservoir_temp") == 30.0
+    assert history.mean("working_function") == 5
+    assert history.mean("dv_temp") == 40.5
@@ -0,0 +1,111 @@
+import logging
+import math
+from datetime import datetime
+
+import pytest
+import requests
+from conftest import FakeResponse
+
+from kronoterm_cloud_api.client import KronotermCloudApi, _decode_timeline_series
+from kronoterm_cloud_api.kronoterm_enums import AnalogSeries, GraphPeriod
+
+
+def ms(when: datetime) -> float:
+    """Get timeline timestamp in [ms] of given datetime."""
+    return when.timestamp() * 1000
+
+
+@pytest.fixture(scope="function")
+def timeline_requests(monkeypatch: pytest.MonkeyPatch) -> tuple[KronotermCloudApi, list[dict], list[FakeResponse]]:
+    """Get KronotermCloudApi with stubbed POST requests, list of sent request data and list of responses.
+
+    Every stubbed response contains one sample at the start of requested day and one at noon.
+    """
+    kronoterm_cloud_api = KronotermCloudApi(username="user", password="password")
+    sent, responses = [], []
+
+    def post(url: str, headers: dict, data: dict) -> FakeResponse:
+        sent.append(data)
+        day = datetime.strptime(f"{data['year']} {data['d1']}", "%Y %j")
+        responses.append(
+            FakeResponse({"result": "success", "trend": {"temp": [[ms(day), 1.0], [ms(day.replace(hour=12)), 2.0]]}})
+        )
+        return responses[-1]
+
+    monkeypatch.setattr(requests, "post", post)
+    return kronoterm_cloud_api, sent, responses
+
+
+def test_decode_timeline_series(caplog: pytest.LogCaptureFixture):
+    """
+    GIVEN timeline response with missing values, malformed points and points outside of the window
+    WHEN response is decoded for window [start, end)
+    THEN only well-formed points within [start, end) must be kept,
+      AND missing values must be NaN,
+      AND dropped points must be logged as warning
+    """
+    points = [[0, 1], [1000, None], [2000, "2.5"], [3000, 3], [4000], "x", ["-", 4]]
+    data = {"result": "success", "trend": {"temp": points}}
+    with caplog.at_level(logging.WARNING):
+        series = _decode_timeline_series(data, start=1, end=3)["trend"]["temp"]
+    assert "dropped 3 malformed and 2 out of period points (kept 2)" in caplog.text
+    assert list(series.timestamps) == [1.0, 2.0]
+    assert math.isnan(series.values[0])
+    assert series.values[1] == 2.5
+
+
+def test_decode_timeline_series_empty(caplog: pytest.LogCaptureFixture):
+    """
+    GIVEN timeline response without any series
+    WHEN response is decoded
+    THEN no series must be returned
+      AND warning must be logged
+    """
+    with caplog.at_level(logging.WARNING):
+        assert _decode_timeline_series({"result": "success"}, start=0, end=1) == {}
+    assert "No timeline series decoded" in caplog.text
+
+
+def test_iter_timeline_chunks(timeline_requests):
+    """
+    GIVEN window starting and ending inside a day
+    WHEN timeline is iterated in DAY chunks
+    THEN first chunk must start at window start, last chunk must be cut at window end,
+      AND only samples within the window must be kept
+    """
+    kronoterm_cloud_api, sent, responses = timeline_requests
+    start, end = datetime(2025, 1, 1, 6), datetime(2025, 1, 3, 12)
+    chunks = list(kronoterm_cloud_api.iter_timeline([AnalogSeries.SERIES_17], start, end))
+    assert [(chunk.start, chunk.end) for chunk in chunks] == [
+        (start, datetime(2025, 1, 2)),
+        (datetime(2025, 1, 2), datetime(2025, 1, 3)),
+        (datetime(2025, 1, 3), end),
+    ]
+    assert [data["d1"] for data in sent] == ["1", "2", "3"]
+    assert [list(chunk.series["trend"]["temp"].values) for chunk in chunks] == [[2.0], [1.0, 2.0], [1.0]]
+    assert [response.json_calls for response in responses] == [1, 1, 1]
+
+
+def test_iter_timeline_hour_chunks(timeline_requests):
+    """
+    GIVEN window spanning two hours
+    WHEN timeline is iterated in HOUR chunks
+    THEN requested hour must be sent as 'd2'
+    """
+    kronoterm_cloud_api, sent, _ = timeline_requests
+    start, end = datetime(2025, 1, 1, 10, 30), datetime(2025, 1, 1, 12)
+    list(kronoterm_cloud_api.iter_timeline([AnalogSeries.SERIES_17], start, end, chunk=GraphPeriod.HOUR))
+    assert [(data["type"], data["d2"]) for data in sent] == [("hour", "10"), ("hour", "11")]
+
+
+@pytest.mark.parametrize("chunk", [GraphPeriod.WEEK, GraphPeriod.MONTH, GraphPeriod.YEAR], ids=["WEEK", "MONTH", "YEAR"])
+def test_iter_timeline_unsupported_chunk(timeline_requests, chunk):
+    """
+    GIVEN chunk period other than DAY or HOUR
+    WHEN timeline iterator is created
+    THEN ValueError must be raised at call time
+    """
+    kronoterm_cloud_api, sent, _ = timeline_requests
+    with pytest.raises(ValueError, match="not supported"):
+        kronoterm_cloud_api.iter_timeline([AnalogSeries.SERIES_17], datetime(2025, 1, 1), datetime(2025, 1, 2), chunk)
+    assert sent == []